@@ -1,13 +1,39 @@
 #!/usr/bin/env python
 
-from datetime import datetime
 import os
-import shutil
 import sys
-import pwd  # to get user name instead of uid
+# shutil, datetime and pwd are imported inside the commands that use them so
+# the shell reaches its first prompt without paying for modules it may never need
 
 THE_PATH = ["/bin/", "/usr/bin/", "/usr/local/bin/", "./"]
 
+# result cache for read-only commands (off until "cache on")
+CACHE_ENABLED = False
+CACHE_SIZE = 256  # max number of results kept, least recently used is dropped first
+CACHE = {}  # (command, path, dev, inode, mtime_ns, ctime_ns) -> printed lines, oldest first
+CACHE_STATS = {"hits": 0, "misses": 0, "evictions": 0}
+
+# max number of names one make command can create from brace patterns
+MAKE_LIMIT = 1000000
+
+# tab completion state
+BUILTINS = sorted(["files", "info", "delete", "copy", "make", "down", "up", "watch", "cache", "history", "jump", "finish"])
+EXEC_DIRS = {}  # THE_PATH dir -> ((dev, inode, mtime_ns), executable names) when it was last read
+EXEC_NAMES = []  # sorted executable names from all of THE_PATH
+LISTINGS_SIZE = 64  # max number of directory listings kept for path completion
+LISTINGS = {}  # directory -> ((dev, inode, mtime_ns), sorted names with "/" after dirs), oldest first
+COMPLETIONS = []  # matches for the word being completed
+
+# command history shared by all sessions, one "\x1e<command>\n" record per command
+HISTORY_FILE = os.environ.get("PSHELL_HISTORY", os.path.expanduser("~/.pshell_history"))
+HISTORY_LOAD = 1000  # number of recent commands given to readline (up arrow and ctrl-r)
+HISTORY_SHOW = 20  # number of commands the history command prints by default
+
+# directories visited, for the jump command: one "rank<TAB>last visit<TAB>path" line each
+DIRS_FILE = os.environ.get("PSHELL_DIRS", os.path.expanduser("~/.pshell_dirs"))
+DIRS_SIZE = 500  # max number of directories remembered, lowest scores are dropped first
+DIRS_MAX_RANK = 5000  # when the ranks add up to more than this they are all aged (scaled down)
+
 # ========================
 #   run command
 # ========================
@@ -44,16 +70,27 @@ def add_path(cmd, executable_dirs):
 # ========================
 def filesCmd(fields):
     """list files and directories in the current directory"""
+    if fields[1:] == ["--follow"]:  # keep the listing up to date until ctrl-c
+        followFiles()
+        return
+
     try:
         # list all files and directories in the current working directory
-        for filename in os.listdir(os.getcwd()):
-            if os.path.isdir(filename):
-                print(f"{filename}/")  # indicate it's a directory
-            else:
-                print(filename)  # print the file name
+        for line in cachedResult("files", os.getcwd(), listFiles):
+            print(line)
     except Exception as e:
         print(f"Error listing files: {e}")
 
+# function to build the lines printed by the files command
+def listFiles(dir_name):
+    lines = []
+    for filename in os.listdir(dir_name):
+        if os.path.isdir(os.path.join(dir_name, filename)):
+            lines.append(f"{filename}/")  # indicate it's a directory
+        else:
+            lines.append(filename)  # the file name
+    return lines
+
 # ========================
 #  info command
 # ========================
@@ -69,30 +106,41 @@ def infoCmd(fields):
         return
 
     try:
-        # retrieve file status using os.stat
-        stat_info = os.stat(file_path)
-        file_type = "directory" if os.path.isdir(file_path) else "file"  # determine file type
-        
-        # get the owner name using pwd.getpwuid
-        # https://stackoverflow.com/questions/1830618/how-to-find-the-owner-of-a-file-or-directory-in-python
-        owner = pwd.getpwuid(stat_info.st_uid).pw_name
-        last_edited = datetime.fromtimestamp(stat_info.st_mtime).strftime('%a %b %d %H:%M:%S %Y')
-        file_size = stat_info.st_size if not os.path.isdir(file_path) else "N/A"
-
-        # check if the file is executable
-        executable = os.access(os.path.abspath(file_path), os.X_OK)
-
         # print information about the file
-        print(f"File Name: {file_path}")
-        print(f"Directory/File: {file_type}")
-        print(f"Owner: {owner}")
-        print(f"Last Edited: {last_edited}")
-        if file_type == "file":
-            print(f"Size (bytes): {file_size}")
-            print(f"Executable?: {executable}")
+        for line in cachedResult("info", file_path, fileInfo):
+            print(line)
     except Exception as e:
         print(f"Error getting info: {e}")
 
+# function to build the lines printed by the info command
+def fileInfo(file_path):
+    from datetime import datetime
+    import pwd  # to get user name instead of uid
+
+    # retrieve file status using os.stat
+    stat_info = os.stat(file_path)
+    file_type = "directory" if os.path.isdir(file_path) else "file"  # determine file type
+
+    # get the owner name using pwd.getpwuid
+    # https://stackoverflow.com/questions/1830618/how-to-find-the-owner-of-a-file-or-directory-in-python
+    owner = pwd.getpwuid(stat_info.st_uid).pw_name
+    last_edited = datetime.fromtimestamp(stat_info.st_mtime).strftime('%a %b %d %H:%M:%S %Y')
+    file_size = stat_info.st_size if not os.path.isdir(file_path) else "N/A"
+
+    # check if the file is executable
+    executable = os.access(os.path.abspath(file_path), os.X_OK)
+
+    lines = [
+        f"File Name: {file_path}",
+        f"Directory/File: {file_type}",
+        f"Owner: {owner}",
+        f"Last Edited: {last_edited}",
+    ]
+    if file_type == "file":
+        lines.append(f"Size (bytes): {file_size}")
+        lines.append(f"Executable?: {executable}")
+    return lines
+
 # ========================
 #  delete command
 # ========================
@@ -110,6 +158,7 @@ def deleteCmd(fields):
     try:
         # remove the file using os.remove
         os.remove(file_path)
+        clearCache()
         print(f"Successfully deleted {file_path}")
     except Exception as e:
         print(f"Error deleting file: {e}")
@@ -134,8 +183,11 @@ def copyCmd(fields):
         return
 
     try:
+        import shutil
+
         # copy the file from source to destination using shutil.copy
         shutil.copy(source, destination)
+        clearCache()
         print(f"Successfully copied {source} to {destination}")
     except Exception as e:
         print(f"Error copying file: {e}")
@@ -144,23 +196,137 @@ def copyCmd(fields):
 #  make command
 # ========================
 def makeCmd(fields):
-    """create a new empty file"""
-    if not checkArgs(fields, 1):  # ensure one argument is provided (the filename)
-        return
+    """create new files: make [--size N] [--sparse] name... (names can use {a,b} and {1..10})"""
+    size = None  # bytes to preallocate in each file, None for empty files
+    sparse = False  # make sparse files with ftruncate instead of allocating blocks
+    names = []
 
-    filename = fields[1]
+    args = fields[1:]
+    i = 0
+    while i < len(args):
+        if args[i] == "--size":
+            if i + 1 == len(args):
+                print("Missing argument for option --size")
+                return
+            size = parseSize(args[i + 1])
+            if size is None:
+                print(f"Error: invalid size {args[i + 1]}")
+                return
+            i += 2
+        elif args[i] == "--sparse":
+            sparse = True
+            i += 1
+        else:
+            try:
+                names.extend(expandBraces(args[i]))
+            except ValueError as e:
+                print(f"Error: {e}")
+                return
+            i += 1
 
-    if os.path.exists(filename):  # check if the file already exists
-        print(f"Error: {filename} already exists.")
+    if not names:  # ensure at least one filename is provided
+        print("Missing argument for command", fields[0])
         return
 
-    try:
-        # create an empty file by opening it in write mode
-        with open(filename, 'w') as f:
-            pass
-        print(f"Successfully created {filename}")
-    except Exception as e:
-        print(f"Error creating file: {e}")
+    created = 0
+    for filename in names:
+        try:
+            # O_EXCL makes the "already exists" check and the create a single syscall
+            fd = os.open(filename, os.O_WRONLY | os.O_CREAT | os.O_EXCL | os.O_CLOEXEC, 0o666)
+        except FileExistsError:
+            print(f"Error: {filename} already exists.")
+            continue
+        except Exception as e:
+            print(f"Error creating file {filename}: {e}")
+            continue
+
+        try:
+            if size and sparse:
+                os.ftruncate(fd, size)
+            elif size:
+                try:
+                    os.posix_fallocate(fd, 0, size)
+                except OSError as e:
+                    import errno
+
+                    if e.errno not in [errno.EOPNOTSUPP, errno.EINVAL]:
+                        raise  # e.g. out of space or over quota, not just "can't preallocate here"
+                    os.ftruncate(fd, size)  # not supported by this filesystem
+            created += 1
+        except Exception as e:
+            # don't leave behind a file that isn't the size that was asked for
+            os.remove(filename)
+            print(f"Error sizing file {filename}: {e} (file removed)")
+        finally:
+            os.close(fd)
+
+    if created:
+        clearCache()
+    if len(names) == 1 and created:
+        print(f"Successfully created {names[0]}")
+    elif len(names) > 1:
+        print(f"Successfully created {created} of {len(names)} files")
+
+# function to turn a size like 4096, 10K, 5M or 1G into a number of bytes (None if invalid)
+def parseSize(text):
+    units = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+    multiplier = units.get(text[-1:].upper(), 1)
+    if multiplier != 1:
+        text = text[:-1]
+    if not text.isdigit():
+        return None
+    return int(text) * multiplier
+
+# function to expand {a,b,c} and {1..10} groups (which can be nested) in a name like bash does
+def expandBraces(word):
+    start = word.find("{")
+    while start >= 0:
+        end, commas = matchBrace(word, start)
+        items = braceItems(word[start + 1:end], [comma - start - 1 for comma in commas]) if end >= 0 else None
+        if items is not None:
+            rest = expandBraces(word[end + 1:])
+            if len(items) * len(rest) > MAKE_LIMIT:
+                raise ValueError(f"{word} makes more than {MAKE_LIMIT} names")
+            return [word[:start] + item + tail for item in items for tail in rest]
+        start = word.find("{", start + 1)  # not a brace group, look for one further on
+    return [word]
+
+# function to find the } that closes the { at start, returns its index (-1 if none) and the
+# indexes of the commas directly inside the group (not inside a nested group)
+def matchBrace(word, start):
+    depth = 0
+    commas = []
+    for i in range(start, len(word)):
+        if word[i] == "{":
+            depth += 1
+        elif word[i] == "}":
+            depth -= 1
+            if depth == 0:
+                return i, commas
+        elif word[i] == "," and depth == 1:
+            commas.append(i)
+    return -1, []
+
+# function to get the names a brace group body stands for (None if it isn't a brace group)
+def braceItems(body, commas):
+    if commas:  # {a,b,{c,d}}
+        parts = [body[start:end] for start, end in zip([0] + [c + 1 for c in commas], commas + [len(body)])]
+        items = [item for part in parts for item in expandBraces(part)]
+        if len(items) > MAKE_LIMIT:
+            raise ValueError(f"{{{body}}} makes more than {MAKE_LIMIT} names")
+        return items
+
+    first, dots, last = body.partition("..")
+    if not (dots and first.lstrip("-").isdigit() and last.lstrip("-").isdigit()):
+        return None
+    low, high = int(first), int(last)
+    if abs(high - low) + 1 > MAKE_LIMIT:  # checked before building the list, so a typo can't hang the shell
+        raise ValueError(f"{{{body}}} makes more than {MAKE_LIMIT} names")
+    step = 1 if high >= low else -1
+    # {01..10} keeps the zero padding
+    padded = (len(first) > 1 and first[0] == "0") or (len(last) > 1 and last[0] == "0")
+    width = max(len(first), len(last)) if padded else 0
+    return [str(n).zfill(width) for n in range(low, high + step, step)]
 
 # ========================
 #  down command
@@ -179,6 +345,7 @@ def downCmd(fields):
     try:
         # change to the specified directory using os.chdir
         os.chdir(dir_name)
+        recordDir()
         print(f"Changed to directory {dir_name}")
     except Exception as e:
         print(f"Error changing directory: {e}")
@@ -191,10 +358,120 @@ def upCmd(fields):
     try:
         # change to the parent directory using os.chdir("..")
         os.chdir("..")
+        recordDir()
         print("Changed to parent directory")
     except Exception as e:
         print(f"Error changing to parent directory: {e}")
 
+# ========================
+#  jump command
+# ========================
+def jumpCmd(fields):
+    """change to the most used/recent directory matching the given fragments"""
+    if len(fields) < 2:  # ensure at least one fragment is provided
+        print("Missing argument for command", fields[0])
+        return
+
+    dir_name = bestDir(fields[1:])
+    if dir_name is None:
+        print(f"Error: no directory matching {' '.join(fields[1:])}")
+        return
+
+    try:
+        os.chdir(dir_name)
+        recordDir()
+        print(f"Changed to directory {dir_name}")
+    except Exception as e:
+        print(f"Error changing directory: {e}")
+
+# function to find the best scoring remembered directory that matches all fragments in order
+def bestDir(fragments):
+    now = timeNow()
+    entries = readDirs()
+    # case sensitive matches first, then any case
+    for fold in [False, True]:
+        best, best_score = None, 0
+        for path, (rank, last_visit) in entries.items():
+            if path == os.getcwd() or not matchesFragments(path, fragments, fold):
+                continue
+            score = frecency(rank, last_visit, now)
+            if score > best_score and os.path.isdir(path):
+                best, best_score = path, score
+        if best is not None:
+            return best
+    return None
+
+# function to check if the fragments appear in path in the given order
+def matchesFragments(path, fragments, fold):
+    if fold:
+        path = path.lower()
+        fragments = [fragment.lower() for fragment in fragments]
+    pos = 0
+    for fragment in fragments:
+        pos = path.find(fragment, pos)
+        if pos < 0:
+            return False
+        pos += len(fragment)
+    # the last fragment has to be in the last part of the path (jump src goes to .../src, not .../src/a/b)
+    return "/" not in path[pos:]
+
+# function to score a directory: how often it was visited, weighted by how long ago
+def frecency(rank, last_visit, now):
+    age = now - last_visit
+    if age < 3600:
+        return rank * 4
+    if age < 86400:
+        return rank * 2
+    if age < 604800:
+        return rank / 2
+    return rank / 4
+
+# function to record a visit to the current directory in the directories file
+def recordDir():
+    try:
+        path = os.getcwd()
+        entries = readDirs()
+        rank, last_visit = entries.get(path, (0, 0))
+        entries[path] = (rank + 1, timeNow())
+
+        if sum(rank for rank, last_visit in entries.values()) > DIRS_MAX_RANK:
+            # age everything so old favourites slowly make room for new ones
+            entries = {path: (rank * 0.9, last_visit) for path, (rank, last_visit) in entries.items() if rank * 0.9 >= 1}
+        if len(entries) > DIRS_SIZE:
+            now = timeNow()
+            keep = sorted(entries, key=lambda path: frecency(*entries[path], now), reverse=True)[:DIRS_SIZE]
+            entries = {path: entries[path] for path in keep}
+
+        # write a new file and rename it over the old one so a reader never sees half a file
+        tmp_name = f"{DIRS_FILE}.{os.getpid()}"
+        with open(tmp_name, "w") as f:
+            for path, (rank, last_visit) in entries.items():
+                f.write(f"{rank:g}\t{last_visit}\t{path}\n")
+        os.replace(tmp_name, DIRS_FILE)
+    except OSError:
+        pass  # not remembering a directory shouldn't stop the shell changing to it
+
+# function to read the directories file into a dict of path -> (rank, last visit)
+def readDirs():
+    entries = {}
+    try:
+        with open(DIRS_FILE) as f:
+            for line in f:
+                try:
+                    rank, last_visit, path = line.rstrip("\n").split("\t", 2)
+                    entries[path] = (float(rank), int(last_visit))
+                except ValueError:
+                    continue  # skip a damaged line
+    except OSError:
+        pass
+    return entries
+
+# function to get the current time in whole seconds
+def timeNow():
+    import time
+
+    return int(time.time())
+
 # ========================
 #  finish command
 # ========================
@@ -203,6 +480,213 @@ def finishCmd(fields):
     print("Exiting shell...")
     sys.exit(0)
 
+# ========================
+#  cache command
+# ========================
+def cacheCmd(fields):
+    """turn the result cache on/off, clear it or show its stats"""
+    global CACHE_ENABLED
+    if not checkArgs(fields, 1):  # ensure one argument is provided (on, off, clear or stats)
+        return
+
+    action = fields[1]
+    if action == "on":
+        CACHE_ENABLED = True
+        print("Result cache on")
+    elif action == "off":
+        CACHE_ENABLED = False
+        clearCache()
+        print("Result cache off")
+    elif action == "clear":
+        clearCache()
+        print("Result cache cleared")
+    elif action == "stats":
+        print(f"Cache: {'on' if CACHE_ENABLED else 'off'}")
+        print(f"Entries: {len(CACHE)}/{CACHE_SIZE}")
+        for name, count in CACHE_STATS.items():
+            print(f"{name.capitalize()}: {count}")
+    else:
+        print("Unknown argument", action, "for command", fields[0])
+
+# function to run a read-only command through the cache
+def cachedResult(name, path, compute):
+    """return compute(path), reusing the last result while path is unchanged"""
+    if not CACHE_ENABLED:
+        return compute(path)
+
+    # the key changes whenever the file/dir is replaced, written to or chmod/chown'd
+    stat_info = os.stat(path)
+    key = (name, path, stat_info.st_dev, stat_info.st_ino, stat_info.st_mtime_ns, stat_info.st_ctime_ns)
+    if key in CACHE:
+        CACHE_STATS["hits"] += 1
+        CACHE[key] = CACHE.pop(key)  # move to the end (most recently used)
+        return CACHE[key]
+
+    CACHE_STATS["misses"] += 1
+    lines = compute(path)
+    CACHE[key] = lines
+    if len(CACHE) > CACHE_SIZE:
+        del CACHE[next(iter(CACHE))]  # drop the least recently used result
+        CACHE_STATS["evictions"] += 1
+    return lines
+
+# function to drop all cached results, called by the commands that change files
+def clearCache():
+    CACHE.clear()
+
+# ========================
+#  watch command
+# ========================
+# inotify event bits, see inotify(7)
+IN_MODIFY = 0x00000002
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_DIR_GONE = IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED
+DIR_CHECK_INTERVAL = 1.0  # seconds between checks that a watched directory still exists
+
+def watchCmd(fields):
+    """print changes to a directory as they happen (until ctrl-c)"""
+    if not checkArgs(fields, 1):  # ensure one argument is provided (the directory name)
+        return
+
+    dir_name = fields[1]
+
+    if not os.path.isdir(dir_name):  # check if the directory exists
+        print(f"Error: {dir_name} does not exist.")
+        return
+
+    try:
+        fd = inotifyOpen(dir_name, IN_CREATE | IN_DELETE | IN_MODIFY | IN_MOVED_FROM | IN_MOVED_TO | IN_DIR_GONE)
+    except Exception as e:
+        print(f"Error watching {dir_name}: {e}")
+        return
+
+    print(f"Watching {dir_name} (ctrl-c to stop)")
+    try:
+        for events in inotifyEvents(fd, dir_name):
+            # a rename inside the directory is a moved from/moved to pair sharing a cookie
+            moved_to = {cookie: name + "/" if mask & IN_ISDIR else name
+                        for mask, cookie, name in events if mask & IN_MOVED_TO}
+            moved_from = {cookie for mask, cookie, name in events if mask & IN_MOVED_FROM}
+            for mask, cookie, name in events:
+                if mask & IN_ISDIR:
+                    name += "/"
+                if mask & IN_Q_OVERFLOW:
+                    print("Too many changes, some events were lost")
+                elif mask & IN_DIR_GONE:
+                    print(f"{dir_name} was deleted or moved, stopped watching")
+                    return
+                elif mask & IN_CREATE:
+                    print(f"created: {name}")
+                elif mask & IN_DELETE:
+                    print(f"deleted: {name}")
+                elif mask & IN_MODIFY:
+                    print(f"modified: {name}")
+                elif mask & IN_MOVED_FROM and cookie in moved_to:
+                    print(f"moved: {name} -> {moved_to[cookie]}")
+                elif mask & IN_MOVED_FROM:
+                    print(f"moved out: {name}")
+                elif cookie not in moved_from:  # already printed with its moved from
+                    print(f"moved in: {name}")
+    except KeyboardInterrupt:
+        print("\nStopped watching")
+    finally:
+        os.close(fd)
+
+# function to keep the files listing up to date until ctrl-c
+def followFiles():
+    dir_name = os.getcwd()
+    try:
+        # start watching before listing so nothing created in between is missed
+        fd = inotifyOpen(dir_name, IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_DIR_GONE)
+    except Exception as e:
+        print(f"Error listing files: {e}")
+        return
+
+    try:
+        # name -> is it a directory, updated from the events instead of re-reading the directory
+        listing = readListing(dir_name)
+        for filename, is_dir in listing.items():
+            print(f"{filename}/" if is_dir else filename)
+        print("(following changes, ctrl-c to stop)")
+
+        for events in inotifyEvents(fd, dir_name):
+            for mask, cookie, filename in events:
+                if mask & IN_Q_OVERFLOW:  # events were lost, fall back to a full listing
+                    listing = readListing(dir_name)
+                    print("Listing out of date, current files:")
+                    for filename, is_dir in listing.items():
+                        print(f"{filename}/" if is_dir else filename)
+                elif mask & IN_DIR_GONE:
+                    print("Directory was deleted or moved, stopped following")
+                    return
+                elif mask & (IN_CREATE | IN_MOVED_TO):
+                    listing[filename] = bool(mask & IN_ISDIR)
+                    print(f"+ {filename}/" if listing[filename] else f"+ {filename}")
+                elif filename in listing:  # deleted or moved out
+                    print(f"- {filename}/" if listing.pop(filename) else f"- {filename}")
+    except KeyboardInterrupt:
+        print("\nStopped following")
+    except Exception as e:
+        print(f"Error listing files: {e}")
+    finally:
+        os.close(fd)
+
+# function to read a directory into a dict of name -> is it a directory
+def readListing(dir_name):
+    with os.scandir(dir_name) as entries:
+        return {entry.name: entry.is_dir() for entry in entries}
+
+# function to start watching a directory with inotify, returns the inotify fd
+def inotifyOpen(dir_name, mask):
+    import ctypes
+
+    libc = ctypes.CDLL(None, use_errno=True)
+    fd = libc.inotify_init1(os.O_CLOEXEC)
+    if fd < 0:
+        errno = ctypes.get_errno()
+        raise OSError(errno, os.strerror(errno))
+    if libc.inotify_add_watch(fd, os.fsencode(dir_name), mask) < 0:
+        errno = ctypes.get_errno()
+        os.close(fd)
+        raise OSError(errno, os.strerror(errno), dir_name)
+    return fd
+
+# function to read inotify events for dir_name, yields a list of (mask, cookie, name) per read
+def inotifyEvents(fd, dir_name):
+    import select
+    import struct
+
+    # the kernel holds back IN_DELETE_SELF while the directory is still a process's cwd (the
+    # shell's own for files --follow), so its link count is checked too, at least once a second
+    dir_fd = os.open(dir_name, os.O_RDONLY | os.O_DIRECTORY | os.O_CLOEXEC)
+    try:
+        while True:
+            events = []
+            if select.select([fd], [], [], DIR_CHECK_INTERVAL)[0]:
+                buf = os.read(fd, 64 * 1024)
+                offset = 0
+                while offset < len(buf):
+                    # struct inotify_event: int wd; uint32 mask; uint32 cookie; uint32 len; char name[len]
+                    wd, mask, cookie, length = struct.unpack_from("iIII", buf, offset)
+                    offset += 16
+                    name = os.fsdecode(buf[offset:offset + length].rstrip(b"\0"))
+                    offset += length
+                    events.append((mask, cookie, name))
+            if os.fstat(dir_fd).st_nlink == 0:  # removed
+                events.append((IN_DELETE_SELF, 0, ""))
+            if events:
+                yield events
+    finally:
+        os.close(dir_fd)
+
 # ========================
 #  checkArgs function
 # ========================
@@ -218,13 +702,411 @@ def checkArgs(fields, num):
     
     return False
 
+# ========================
+#  history command
+# ========================
+def historyCmd(fields):
+    """print recent commands: history [n] | history search <text> | history prefix <text>"""
+    if len(fields) == 1:
+        entries = historyEntries(HISTORY_SHOW)
+    elif len(fields) == 2 and fields[1].isdigit():
+        entries = historyEntries(int(fields[1]))
+    elif len(fields) >= 3 and fields[1] in ["search", "prefix"]:
+        text = " ".join(fields[2:])
+        entries = historySearch(text, fields[1] == "prefix", HISTORY_SHOW)[::-1]  # oldest first
+    else:
+        print("Usage: history [n] | history search <text> | history prefix <text>")
+        return
+
+    for entry in entries:
+        print(entry)
+
+# function to append a command typed at the terminal to the history file
+def addHistory(line):
+    if not sys.stdin.isatty():  # scripted runs (piped input) don't fill the history
+        return
+    if "\x1e" in line:  # it would end the record early, so a command holding it isn't kept
+        return
+
+    # one write on an O_APPEND fd puts the whole record at the end of the file,
+    # so records from sessions running at the same time don't get mixed up
+    record = b"\x1e" + line.encode("utf-8", "surrogateescape") + b"\n"
+    try:
+        fd = os.open(HISTORY_FILE, os.O_WRONLY | os.O_APPEND | os.O_CREAT | os.O_CLOEXEC, 0o600)
+        try:
+            os.write(fd, record)
+        finally:
+            os.close(fd)
+    except OSError:
+        pass  # no history is better than a shell that can't run commands
+
+# function to memory-map the history file (None if there is no history yet)
+def mapHistory():
+    import mmap
+
+    try:
+        with open(HISTORY_FILE, "rb") as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):  # missing or empty file
+        return None
+
+# function to get the last n commands, oldest first, reading only the end of the file
+def historyEntries(n):
+    if n <= 0:
+        return []
+    try:
+        fd = os.open(HISTORY_FILE, os.O_RDONLY | os.O_CLOEXEC)
+    except OSError:
+        return []
+    try:
+        # read backwards from the end until the tail holds n + 1 record separators
+        # (one extra in case the last record is a torn write) or the whole file
+        start = os.fstat(fd).st_size
+        chunk_size = 64 * 1024
+        data = b""
+        while start > 0 and data.count(b"\x1e") <= n:
+            chunk_size = min(chunk_size * 2, start)
+            start -= chunk_size
+            data = os.pread(fd, chunk_size, start) + data
+    finally:
+        os.close(fd)
+
+    records = []
+    for record in data.split(b"\x1e")[1:]:  # the piece before the first separator is not a whole record
+        if record.endswith(b"\n") and b"\n" not in record[:-1]:  # skip torn writes
+            records.append(record[:-1].decode("utf-8", "surrogateescape"))
+    return records[-n:]
+
+# function to find the newest commands containing (or starting with) text, newest first
+def historySearch(text, prefix_only, limit):
+    data = mapHistory()
+    if data is None:
+        return []
+
+    needle = text.encode("utf-8", "surrogateescape")
+    if prefix_only:
+        needle = b"\x1e" + needle
+    results = []
+    with data:
+        end = len(data)
+        while len(results) < limit:
+            pos = data.rfind(needle, 0, end)  # search backwards from the newest record
+            if pos < 0:
+                break
+            start = data.rfind(b"\x1e", 0, pos + 1)  # start of the record holding the match
+            stop = data.find(b"\n", pos)
+            if start < 0:
+                break
+            record = data[start + 1:stop]
+            if stop >= 0 and b"\x1e" not in record:
+                entry = record.decode("utf-8", "surrogateescape")
+                if entry not in results:  # show a repeated command once
+                    results.append(entry)
+            end = start
+    return results
+
+# function to give readline the recent history (for the up arrow and ctrl-r)
+def setupHistory():
+    if not sys.stdin.isatty():
+        return
+    try:
+        import readline
+    except ImportError:
+        return
+
+    readline.clear_history()
+    for entry in historyEntries(HISTORY_LOAD):
+        readline.add_history(entry)
+
+# ========================
+#  tab completion
+# ========================
+def setupCompletion():
+    """turn on tab completion when the shell is interactive and readline is available"""
+    if not sys.stdin.isatty():
+        return
+    try:
+        import readline
+    except ImportError:
+        return
+
+    readline.set_completer_delims(" \t\n")  # so a path like a/b/c is one word
+    readline.set_completer(completeWord)
+    if "libedit" in (readline.__doc__ or ""):  # macOS
+        readline.parse_and_bind("bind ^I rl_complete")
+    else:
+        readline.parse_and_bind("tab: complete")
+
+# function readline calls with state 0, 1, 2... until it gets None
+def completeWord(text, state):
+    if state == 0:
+        import readline
+
+        first_word = not readline.get_line_buffer()[:readline.get_begidx()].strip()
+        try:
+            if first_word and not text.startswith(("/", ".", "~")):
+                commands = prefixMatches(BUILTINS, text) + prefixMatches(executableNames(), text) + relativeExecutables(text)
+                COMPLETIONS[:] = [name + " " for name in sorted(set(commands))]
+            else:
+                COMPLETIONS[:] = completePath(text)
+        except OSError:
+            COMPLETIONS[:] = []
+    return COMPLETIONS[state] if state < len(COMPLETIONS) else None
+
+# function to get the names in a sorted list that start with prefix (binary search, no scan)
+def prefixMatches(names, prefix):
+    import bisect
+
+    start = bisect.bisect_left(names, prefix)
+    end = bisect.bisect_left(names, prefix + "\U0010ffff", start)
+    return names[start:end]
+
+# function to get the sorted executable names in the absolute THE_PATH dirs, re-reading only dirs that changed
+def executableNames():
+    global EXEC_NAMES
+    changed = False
+    for dir in THE_PATH:
+        if not os.path.isabs(dir):  # ./ follows the working directory, see relativeExecutables
+            continue
+        try:
+            stat_info = os.stat(dir)
+        except OSError:
+            changed = changed or EXEC_DIRS.pop(dir, None) is not None
+            continue
+        key = (stat_info.st_dev, stat_info.st_ino, stat_info.st_mtime_ns)
+        if dir in EXEC_DIRS and EXEC_DIRS[dir][0] == key:
+            continue
+        with os.scandir(dir) as entries:
+            names = [entry.name for entry in entries if entry.is_file() and os.access(entry.path, os.X_OK)]
+        EXEC_DIRS[dir] = (key, names)
+        changed = True
+
+    if changed:
+        EXEC_NAMES = sorted({name for key, names in EXEC_DIRS.values() for name in names})
+    return EXEC_NAMES
+
+# function to get the executables starting with prefix in the relative THE_PATH dirs (./),
+# taken from the cached directory listing so only the matching names are checked
+def relativeExecutables(prefix):
+    if not prefix:  # every file in the directory would need an access() check
+        return []
+    names = []
+    for dir in THE_PATH:
+        if os.path.isabs(dir):
+            continue
+        try:
+            matches = prefixMatches(dirListing(dir), prefix)
+        except OSError:
+            continue
+        names += [name for name in matches if not name.endswith("/") and os.access(os.path.join(dir, name), os.X_OK)]
+    return names
+
+# function to complete a file or directory path
+def completePath(text):
+    dir_part, base = os.path.split(text)
+    head = text[:len(text) - len(base)]  # what the user typed before the name being completed
+    head = os.path.expanduser(head)  # the command line doesn't expand ~, so the match has to
+    matches = prefixMatches(dirListing(os.path.expanduser(dir_part) or "."), base)
+    # a space after files so the next word can be typed, none after dirs so the path can go on
+    return [head + name if name.endswith("/") else head + name + " " for name in matches]
+
+# function to get the sorted names in a directory, re-reading it only when its mtime changes
+def dirListing(dir_name):
+    stat_info = os.stat(dir_name)
+    key = (stat_info.st_dev, stat_info.st_ino, stat_info.st_mtime_ns)
+    path = os.path.abspath(dir_name)
+    if path in LISTINGS and LISTINGS[path][0] == key:
+        LISTINGS[path] = LISTINGS.pop(path)  # move to the end (most recently used)
+        return LISTINGS[path][1]
+
+    with os.scandir(dir_name) as entries:
+        names = sorted(entry.name + "/" if entry.is_dir() else entry.name for entry in entries)
+    LISTINGS.pop(path, None)
+    LISTINGS[path] = (key, names)
+    if len(LISTINGS) > LISTINGS_SIZE:
+        del LISTINGS[next(iter(LISTINGS))]  # drop the least recently used listing
+    return names
+
+# ========================
+#  command line parsing
+# ========================
+GLOB_CHARS = "*?["
+
+def splitLine(line):
+    """split a command line into fields, expanding unquoted *, ?, [...] and ** patterns"""
+    fields = []
+    for text, pattern in splitWords(line):
+        # like other shells, a pattern that matches nothing is passed on as it is
+        # (the set drops paths found twice, e.g. by a/**/b/**/c)
+        matches = sorted(set(globPaths(pattern))) if pattern is not None else []
+        fields.extend(matches or [text])
+    return fields
+
+# function to split a line into (text, pattern) words; pattern is None unless the word has
+# unquoted wildcards, and has the quoted ones escaped as [*] so they only match themselves
+def splitWords(line):
+    words = []
+    text = pattern = None  # None until a word has started
+    wild = False
+    quote = None
+    i = 0
+    while i < len(line):
+        char = line[i]
+        if quote is None and char.isspace():
+            if text is not None:
+                words.append((text, pattern if wild else None))
+                text = pattern = None
+                wild = False
+            i += 1
+            continue
+
+        if text is None:
+            text = pattern = ""
+        if quote is not None:
+            if char == quote:
+                quote = None
+            elif quote == '"' and char == "\\" and line[i + 1:i + 2] in ['"', "\\"]:  # \" and \\ inside "..."
+                i += 1
+                text += line[i]
+                pattern += line[i]
+            else:
+                text += char
+                pattern += f"[{char}]" if char in GLOB_CHARS else char
+        elif char in "'\"":
+            quote = char
+        elif char == "\\" and i + 1 < len(line):  # backslash escapes the next character
+            i += 1
+            text += line[i]
+            pattern += f"[{line[i]}]" if line[i] in GLOB_CHARS else line[i]
+        else:
+            text += char
+            pattern += char
+            wild = wild or char in GLOB_CHARS
+        i += 1
+
+    if quote is not None:
+        raise ValueError(f"missing closing {quote}")
+    if text is not None:
+        words.append((text, pattern if wild else None))
+    return words
+
+# function to find the paths matching a glob pattern, yielding them as they are found
+def globPaths(pattern):
+    import fnmatch
+    import re
+
+    # compile each part of the pattern once: ("name", text), ("match", (regex match, can match .names)) or ("**", None)
+    segments = []
+    for part in pattern.split("/"):
+        if not part or part == "**" and segments and segments[-1][0] == "**":
+            continue  # leading, doubled or trailing / and repeated **
+        if part == "**":
+            segments.append(("**", None))
+        elif any(char in part for char in GLOB_CHARS):
+            segments.append(("match", (re.compile(fnmatch.translate(part)).match, part.startswith("."))))
+        else:
+            segments.append(("name", part))
+
+    prefix = "/" if pattern.startswith("/") else ""
+    dirs_only = pattern.endswith("/")
+    yield from matchSegments(prefix, segments, dirs_only)
+
+# function to yield the paths under prefix that match the compiled segments
+def matchSegments(prefix, segments, dirs_only):
+    kind, value = segments[0]
+    rest = segments[1:]
+
+    if kind == "**":
+        if not rest and prefix:  # like bash, x/** and x/**/ include x/ itself
+            yield os.path.join(prefix, "")
+        yield from matchStar(prefix, rest, dirs_only)
+        return
+
+    if kind == "name":  # plain names are looked up directly, no need to read the directory
+        path = os.path.join(prefix, value)
+        if rest:
+            if os.path.isdir(path):
+                yield from matchSegments(path, rest, dirs_only)
+        elif os.path.lexists(path) and (not dirs_only or os.path.isdir(path)):
+            yield path + "/" if dirs_only else path
+        return
+
+    try:
+        entries = list(os.scandir(prefix or "."))
+    except OSError:
+        return
+    for entry in entries:
+        if matchName(value, entry.name):
+            yield from matchEntry(entry, os.path.join(prefix, entry.name), rest, dirs_only)
+
+# function to match ** (zero or more directories) followed by rest, reading each directory once
+def matchStar(prefix, rest, dirs_only):
+    if rest and rest[0][0] == "name":  # zero directories: check the plain name directly
+        yield from matchSegments(prefix, rest, dirs_only)
+
+    try:
+        entries = list(os.scandir(prefix or "."))
+    except OSError:
+        return
+    for entry in entries:
+        path = os.path.join(prefix, entry.name)
+        if not rest:  # ** at the end matches everything below
+            if not entry.name.startswith("."):
+                yield from matchEntry(entry, path, rest, dirs_only)
+        elif rest[0][0] == "match" and matchName(rest[0][1], entry.name):  # zero directories
+            yield from matchEntry(entry, path, rest[1:], dirs_only)
+        # one more directory (hidden and symlinked ones are skipped, like bash)
+        if entry.is_dir(follow_symlinks=False) and not entry.name.startswith("."):
+            yield from matchStar(path, rest, dirs_only)
+
+# function to yield path if it is a complete match, or carry on matching inside it
+def matchEntry(entry, path, rest, dirs_only):
+    if rest:
+        if entry.is_dir():
+            yield from matchSegments(path, rest, dirs_only)
+    elif not dirs_only:
+        yield path
+    elif entry.is_dir():
+        yield path + "/"
+
+# function to check a name against a compiled pattern (names starting with . need a pattern starting with .)
+def matchName(value, name):
+    match, dot_ok = value
+    if name.startswith(".") and not dot_ok:
+        return False
+    return match(name) is not None
+
+# ========================
+#  startup report
+# ========================
+def startupReport():
+    """re-run the shell under -X importtime if --startup-report was given"""
+    if "--startup-report" not in sys.argv:
+        return
+    sys.argv.remove("--startup-report")
+    if "importtime" not in sys._xoptions:  # not re-run yet
+        # every import (including the lazy ones done by the commands) is timed on stderr
+        os.execv(sys.executable, [sys.executable, "-X", "importtime"] + sys.argv)
+
 # ========================
 #  main function
 # ========================
 def main():
+    startupReport()
+    setupCompletion()
+    setupHistory()
     while True:
         line = input("PShell>")
-        fields = line.split()  # split the input into fields (command and arguments)
+        if line.strip():
+            addHistory(line)
+        try:
+            # split the input into fields (command and arguments), expanding wildcards
+            fields = splitLine(line)
+        except ValueError as e:
+            print(f"Error: {e}")
+            continue
+        if not fields:
+            continue
     
         # handle different commands
         if fields[0] == "files":
@@ -241,6 +1123,14 @@ def main():
             downCmd(fields)
         elif fields[0] == "up":
             upCmd(fields)
+        elif fields[0] == "watch":
+            watchCmd(fields)
+        elif fields[0] == "cache":
+            cacheCmd(fields)
+        elif fields[0] == "history":
+            historyCmd(fields)
+        elif fields[0] == "jump":
+            jumpCmd(fields)
         elif fields[0] == "finish":
             finishCmd(fields)
         else:
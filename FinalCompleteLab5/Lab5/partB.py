@@ -9,16 +9,39 @@ see https://peps.python.org/pep-0008 and https://peps.python.org/pep-0257/
 (note: the breakdown into input/action/output in this script is just a suggestion.)
 """
 
-import glob
 import os
-import pwd
-import shutil
 import sys
-import time
+# pwd and time are imported inside file_info so the shell reaches its first
+# prompt without paying for modules that a session may never need
 
 # define the directories to search for executable files
 THE_PATH = ["/bin/", "/usr/bin/", "/usr/local/bin/", "./"]
 
+# modules the python launcher (zygote) imports once so the scripts it runs don't have to;
+# the first line is what launching a script imports itself (runpy.run_path pulls in pkgutil)
+ZYGOTE_PRELOAD = ["runpy", "pkgutil", "threading", "atexit", "weakref", "traceback", "signal",
+                  "re", "json", "collections", "pathlib", "subprocess"]
+ZYGOTE = None  # (pid, request fd, reply fd) of the running zygote, None when not started
+
+# result cache for read-only commands (off until "cache on")
+CACHE_ENABLED = False
+CACHE_SIZE = 256  # max number of results kept, least recently used is dropped first
+CACHE = {}  # (command, path, dev, inode, mtime_ns, ctime_ns) -> printed lines, oldest first
+CACHE_STATS = {"hits": 0, "misses": 0, "evictions": 0}
+
+# tab completion state
+BUILTINS = sorted(["files", "info", "watch", "cache", "history", "exit"])
+EXEC_DIRS = {}  # THE_PATH dir -> ((dev, inode, mtime_ns), executable names) when it was last read
+EXEC_NAMES = []  # sorted executable names from all of THE_PATH
+LISTINGS_SIZE = 64  # max number of directory listings kept for path completion
+LISTINGS = {}  # directory -> ((dev, inode, mtime_ns), sorted names with "/" after dirs), oldest first
+COMPLETIONS = []  # matches for the word being completed
+
+# command history shared by all sessions, one "\x1e<command>\n" record per command
+HISTORY_FILE = os.environ.get("PSHELL_HISTORY", os.path.expanduser("~/.pshell_history"))
+HISTORY_LOAD = 1000  # number of recent commands given to readline (up arrow and ctrl-r)
+HISTORY_SHOW = 20  # number of commands the history command prints by default
+
 # ========================
 #    files command
 #    list file and directory names
@@ -33,13 +56,23 @@ def files_cmd(fields):
     output: returns no return value
     """
     
-    if checkArgs(fields, 0):  # check if there are no arguments provided
+    if fields[1:] == ["--follow"]:  # keep the listing up to date until ctrl-c
+        follow_files()
+    elif checkArgs(fields, 0):  # check if there are no arguments provided
         # list all files and directories in the current working directory
-        for filename in os.listdir('.'):
-            if os.path.isdir(os.path.abspath(filename)):  # check if it's a directory
-                print("dir:", filename)
-            else:
-                print("file:", filename)
+        for line in cached_result("files", os.getcwd(), list_files):
+            print(line)
+
+def list_files(dir_name):
+    """returns the lines printed by the files command for dir_name."""
+    
+    lines = []
+    for filename in os.listdir(dir_name):
+        if os.path.isdir(os.path.join(dir_name, filename)):  # check if it's a directory
+            lines.append(f"dir: {filename}")
+        else:
+            lines.append(f"file: {filename}")
+    return lines
 
 # ========================
 #  info command
@@ -59,27 +92,430 @@ def info_cmd(fields):
         return
 
     try:
-        stat_info = os.stat(file_path)
-        file_type = "directory" if os.path.isdir(file_path) else "file"
-        
-        # get the owner name using pwd.getpwuid
-        owner = pwd.getpwuid(stat_info.st_uid).pw_name
-        last_edited = time.ctime(stat_info.st_mtime)
-        file_size = stat_info.st_size if not os.path.isdir(file_path) else "N/A"
-
-        # Check if the file is executable
-        executable = os.access(file_path, os.X_OK)
-
-        print(f"File Name: {file_path}")
-        print(f"Type: {file_type}")
-        print(f"Owner: {owner}")
-        print(f"Last Edited: {last_edited}")
-        if file_type == "file":
-            print(f"Size (bytes): {file_size}")
-            print(f"Executable?: {executable}")
+        for line in cached_result("info", file_path, file_info):
+            print(line)
     except Exception as e:
         print(f"Error getting info: {e}")
 
+def file_info(file_path):
+    """returns the lines printed by the info command for file_path."""
+    
+    import pwd
+    import time
+
+    stat_info = os.stat(file_path)
+    file_type = "directory" if os.path.isdir(file_path) else "file"
+    
+    # get the owner name using pwd.getpwuid
+    owner = pwd.getpwuid(stat_info.st_uid).pw_name
+    last_edited = time.ctime(stat_info.st_mtime)
+    file_size = stat_info.st_size if not os.path.isdir(file_path) else "N/A"
+
+    # Check if the file is executable
+    executable = os.access(file_path, os.X_OK)
+
+    lines = [
+        f"File Name: {file_path}",
+        f"Type: {file_type}",
+        f"Owner: {owner}",
+        f"Last Edited: {last_edited}",
+    ]
+    if file_type == "file":
+        lines.append(f"Size (bytes): {file_size}")
+        lines.append(f"Executable?: {executable}")
+    return lines
+
+# ========================
+#  cache command
+#     control the result cache
+#     1 command argument: on, off, clear or stats
+# ========================
+def cache_cmd(fields):
+    """turns the result cache on/off, clears it or prints its stats."""
+    
+    global CACHE_ENABLED
+    if not checkArgs(fields, 1):  # check if there's exactly one argument
+        return
+
+    action = fields[1]
+    if action == "on":
+        CACHE_ENABLED = True
+        print("Result cache on")
+    elif action == "off":
+        CACHE_ENABLED = False
+        clear_cache()
+        print("Result cache off")
+    elif action == "clear":
+        clear_cache()
+        print("Result cache cleared")
+    elif action == "stats":
+        print(f"Cache: {'on' if CACHE_ENABLED else 'off'}")
+        print(f"Entries: {len(CACHE)}/{CACHE_SIZE}")
+        for name, count in CACHE_STATS.items():
+            print(f"{name.capitalize()}: {count}")
+    else:
+        print("Unknown argument", action, "for command", fields[0])
+
+def cached_result(name, path, compute):
+    """returns compute(path), reusing the last result while path is unchanged.
+    
+    input: the command name, the file/dir path and the function that builds the result
+    action: when the cache is on, looks up the result under the path's device, inode,
+            mtime and ctime (so any change to the file/dir gives a new key), keeping
+            at most CACHE_SIZE results and dropping the least recently used one
+    output: returns the list of lines to print
+    """
+    
+    if not CACHE_ENABLED:
+        return compute(path)
+
+    stat_info = os.stat(path)
+    key = (name, path, stat_info.st_dev, stat_info.st_ino, stat_info.st_mtime_ns, stat_info.st_ctime_ns)
+    if key in CACHE:
+        CACHE_STATS["hits"] += 1
+        CACHE[key] = CACHE.pop(key)  # move to the end (most recently used)
+        return CACHE[key]
+
+    CACHE_STATS["misses"] += 1
+    lines = compute(path)
+    CACHE[key] = lines
+    if len(CACHE) > CACHE_SIZE:
+        del CACHE[next(iter(CACHE))]  # drop the least recently used result
+        CACHE_STATS["evictions"] += 1
+    return lines
+
+def clear_cache():
+    """drops all cached results (to be called by any command that changes files)."""
+    
+    CACHE.clear()
+
+# ========================
+#  watch command
+#     print changes to a directory as they happen
+#     1 command argument: directory name
+# ========================
+# inotify event bits, see inotify(7)
+IN_MODIFY = 0x00000002
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_DIR_GONE = IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED
+DIR_CHECK_INTERVAL = 1.0  # seconds between checks that a watched directory still exists
+
+def watch_cmd(fields):
+    """return nothing after printing changes to a directory until ctrl-c.
+    
+    input: takes a list of text fields
+    action: prints each create, delete, modify and move event inotify reports for the
+            directory, pairing the two halves of a rename into one line
+    output: returns no return value
+    """
+    
+    if not checkArgs(fields, 1):  # check if there's exactly one argument
+        return
+
+    dir_name = fields[1]
+
+    if not os.path.isdir(dir_name):
+        print(f"Error: {dir_name} does not exist.")
+        return
+
+    try:
+        fd = inotify_open(dir_name, IN_CREATE | IN_DELETE | IN_MODIFY | IN_MOVED_FROM | IN_MOVED_TO | IN_DIR_GONE)
+    except Exception as e:
+        print(f"Error watching {dir_name}: {e}")
+        return
+
+    print(f"Watching {dir_name} (ctrl-c to stop)")
+    try:
+        for events in inotify_events(fd, dir_name):
+            # a rename inside the directory is a moved from/moved to pair sharing a cookie
+            moved_to = {cookie: name for mask, cookie, name in events if mask & IN_MOVED_TO}
+            moved_from = {cookie for mask, cookie, name in events if mask & IN_MOVED_FROM}
+            for mask, cookie, name in events:
+                kind = "dir" if mask & IN_ISDIR else "file"
+                if mask & IN_Q_OVERFLOW:
+                    print("Too many changes, some events were lost")
+                elif mask & IN_DIR_GONE:
+                    print(f"{dir_name} was deleted or moved, stopped watching")
+                    return
+                elif mask & IN_CREATE:
+                    print(f"created {kind}:", name)
+                elif mask & IN_DELETE:
+                    print(f"deleted {kind}:", name)
+                elif mask & IN_MODIFY:
+                    print(f"modified {kind}:", name)
+                elif mask & IN_MOVED_FROM and cookie in moved_to:
+                    print(f"moved {kind}:", name, "->", moved_to[cookie])
+                elif mask & IN_MOVED_FROM:
+                    print(f"moved out {kind}:", name)
+                elif cookie not in moved_from:  # already printed with its moved from
+                    print(f"moved in {kind}:", name)
+    except KeyboardInterrupt:
+        print("\nStopped watching")
+    finally:
+        os.close(fd)
+
+def follow_files():
+    """return nothing after printing the files listing and following its changes until ctrl-c.
+    
+    input: no function arguments
+    action: prints the working directory listing once, then prints a + or - line for
+            each entry inotify reports as added or removed (the directory is only
+            re-read if the kernel drops events)
+    output: returns no return value
+    """
+    
+    dir_name = os.getcwd()
+    try:
+        # start watching before listing so nothing created in between is missed
+        fd = inotify_open(dir_name, IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_DIR_GONE)
+    except Exception as e:
+        print(f"Error listing files: {e}")
+        return
+
+    try:
+        listing = read_listing(dir_name)  # name -> is it a directory
+        for filename, is_dir in listing.items():
+            print("dir:" if is_dir else "file:", filename)
+        print("(following changes, ctrl-c to stop)")
+
+        for events in inotify_events(fd, dir_name):
+            for mask, cookie, filename in events:
+                if mask & IN_Q_OVERFLOW:  # events were lost, fall back to a full listing
+                    listing = read_listing(dir_name)
+                    print("Listing out of date, current files:")
+                    for filename, is_dir in listing.items():
+                        print("dir:" if is_dir else "file:", filename)
+                elif mask & IN_DIR_GONE:
+                    print("Directory was deleted or moved, stopped following")
+                    return
+                elif mask & (IN_CREATE | IN_MOVED_TO):
+                    listing[filename] = bool(mask & IN_ISDIR)
+                    print("+ dir:" if listing[filename] else "+ file:", filename)
+                elif filename in listing:  # deleted or moved out
+                    print("- dir:" if listing.pop(filename) else "- file:", filename)
+    except KeyboardInterrupt:
+        print("\nStopped following")
+    except Exception as e:
+        print(f"Error listing files: {e}")
+    finally:
+        os.close(fd)
+
+def read_listing(dir_name):
+    """returns a dict of name -> is it a directory for the entries of dir_name."""
+    
+    with os.scandir(dir_name) as entries:
+        return {entry.name: entry.is_dir() for entry in entries}
+
+def inotify_open(dir_name, mask):
+    """returns an inotify file descriptor watching dir_name for the events in mask.
+    
+    input: the directory to watch and a mask of IN_* event bits
+    action: calls inotify_init1 and inotify_add_watch from libc through ctypes
+    output: returns the file descriptor (raises OSError on failure)
+    """
+    
+    import ctypes
+
+    libc = ctypes.CDLL(None, use_errno=True)
+    fd = libc.inotify_init1(os.O_CLOEXEC)
+    if fd < 0:
+        errno = ctypes.get_errno()
+        raise OSError(errno, os.strerror(errno))
+    if libc.inotify_add_watch(fd, os.fsencode(dir_name), mask) < 0:
+        errno = ctypes.get_errno()
+        os.close(fd)
+        raise OSError(errno, os.strerror(errno), dir_name)
+    return fd
+
+def inotify_events(fd, dir_name):
+    """yields a list of (mask, cookie, name) tuples for each read from an inotify fd.
+    
+    input: an inotify file descriptor and the directory it watches
+    action: waits for events and decodes each struct inotify_event; also adds an
+            IN_DELETE_SELF event once the directory's link count drops to 0
+    output: yields one list of events per read, forever
+    """
+    
+    import select
+    import struct
+
+    # the kernel holds back IN_DELETE_SELF while the directory is still a process's cwd (the
+    # shell's own for files --follow), so its link count is checked too, at least once a second
+    dir_fd = os.open(dir_name, os.O_RDONLY | os.O_DIRECTORY | os.O_CLOEXEC)
+    try:
+        while True:
+            events = []
+            if select.select([fd], [], [], DIR_CHECK_INTERVAL)[0]:
+                buf = os.read(fd, 64 * 1024)
+                offset = 0
+                while offset < len(buf):
+                    # struct inotify_event: int wd; uint32 mask; uint32 cookie; uint32 len; char name[len]
+                    wd, mask, cookie, length = struct.unpack_from("iIII", buf, offset)
+                    offset += 16
+                    name = os.fsdecode(buf[offset:offset + length].rstrip(b"\0"))
+                    offset += length
+                    events.append((mask, cookie, name))
+            if os.fstat(dir_fd).st_nlink == 0:  # removed
+                events.append((IN_DELETE_SELF, 0, ""))
+            if events:
+                yield events
+    finally:
+        os.close(dir_fd)
+
+# ========================
+#  history command
+#     list or search earlier commands
+#     optional arguments: n, or search/prefix and the text to look for
+# ========================
+def history_cmd(fields):
+    """return nothing after printing earlier commands from the history file.
+    
+    input: takes a list of text fields
+    action: prints the last HISTORY_SHOW commands (or the last n), or with "search"/"prefix"
+            the newest commands containing/starting with the text, oldest first
+    output: returns no return value
+    """
+    
+    if len(fields) == 1:
+        entries = history_entries(HISTORY_SHOW)
+    elif len(fields) == 2 and fields[1].isdigit():
+        entries = history_entries(int(fields[1]))
+    elif len(fields) >= 3 and fields[1] in ["search", "prefix"]:
+        text = " ".join(fields[2:])
+        entries = history_search(text, fields[1] == "prefix", HISTORY_SHOW)[::-1]  # oldest first
+    else:
+        print("Usage: history [n] | history search <text> | history prefix <text>")
+        return
+
+    for entry in entries:
+        print(entry)
+
+def add_history(line):
+    """appends a command typed at the terminal to the history file.
+    
+    input: the command line
+    action: writes one "\x1e<command>\n" record with a single write on an O_APPEND fd, so
+            the record lands whole at the end of the file even with other sessions writing
+            (nothing is written for piped input, or for a command containing \x1e since
+            it would end the record early)
+    output: returns no return value (errors are ignored)
+    """
+    
+    if not sys.stdin.isatty() or "\x1e" in line:
+        return
+
+    record = b"\x1e" + line.encode("utf-8", "surrogateescape") + b"\n"
+    try:
+        fd = os.open(HISTORY_FILE, os.O_WRONLY | os.O_APPEND | os.O_CREAT | os.O_CLOEXEC, 0o600)
+        try:
+            os.write(fd, record)
+        finally:
+            os.close(fd)
+    except OSError:
+        pass  # no history is better than a shell that can't run commands
+
+def map_history():
+    """returns the history file memory-mapped read-only, or None if there is no history yet."""
+    
+    import mmap
+
+    try:
+        with open(HISTORY_FILE, "rb") as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):  # missing or empty file
+        return None
+
+def history_entries(n):
+    """returns the last n commands, oldest first.
+    
+    input: the number of commands wanted
+    action: reads the file backwards in growing chunks until n record separators are
+            found, so only the tail is read however long the history is (and no
+            re/mmap import is needed before the first prompt)
+    output: returns a list of commands (torn records are skipped)
+    """
+    
+    if n <= 0:
+        return []
+    try:
+        fd = os.open(HISTORY_FILE, os.O_RDONLY | os.O_CLOEXEC)
+    except OSError:
+        return []
+    try:
+        # read backwards from the end until the tail holds n + 1 record separators
+        # (one extra in case the last record is a torn write) or the whole file
+        start = os.fstat(fd).st_size
+        chunk_size = 64 * 1024
+        data = b""
+        while start > 0 and data.count(b"\x1e") <= n:
+            chunk_size = min(chunk_size * 2, start)
+            start -= chunk_size
+            data = os.pread(fd, chunk_size, start) + data
+    finally:
+        os.close(fd)
+
+    records = []
+    for record in data.split(b"\x1e")[1:]:  # the piece before the first separator is not a whole record
+        if record.endswith(b"\n") and b"\n" not in record[:-1]:  # skip torn writes
+            records.append(record[:-1].decode("utf-8", "surrogateescape"))
+    return records[-n:]
+
+def history_search(text, prefix_only, limit):
+    """returns up to limit different commands containing (or starting with) text, newest first.
+    
+    input: the text to look for, whether it must be at the start, and the max number of results
+    action: searches the mapped history file backwards from the end with rfind
+    output: returns a list of commands
+    """
+    
+    data = map_history()
+    if data is None:
+        return []
+
+    needle = text.encode("utf-8", "surrogateescape")
+    if prefix_only:
+        needle = b"\x1e" + needle
+    results = []
+    with data:
+        end = len(data)
+        while len(results) < limit:
+            pos = data.rfind(needle, 0, end)
+            if pos < 0:
+                break
+            start = data.rfind(b"\x1e", 0, pos + 1)  # start of the record holding the match
+            stop = data.find(b"\n", pos)
+            if start < 0:
+                break
+            record = data[start + 1:stop]
+            if stop >= 0 and b"\x1e" not in record:
+                entry = record.decode("utf-8", "surrogateescape")
+                if entry not in results:  # show a repeated command once
+                    results.append(entry)
+            end = start
+    return results
+
+def setup_history():
+    """gives readline the last HISTORY_LOAD commands (for the up arrow and ctrl-r)."""
+    
+    if not sys.stdin.isatty():
+        return
+    try:
+        import readline
+    except ImportError:
+        return
+
+    readline.clear_history()
+    for entry in history_entries(HISTORY_LOAD):
+        readline.add_history(entry)
+
 # ----------------------
 # Other functions
 # ----------------------
@@ -120,19 +556,24 @@ def run_external_command(fields):
         print(f"Error: Command '{cmd}' not found in path.")
         return
 
-    pid = os.fork()  # create a child process
-    if pid == 0:  # child process
-        try:
-            os.execv(execname, fields)  # replace the child process with the external command
-        except Exception as e:
-            print(f"Error executing command: {e}")
-            os._exit(1)  # exit the child process with error code 1
-    else:  # parent process
+    status = None
+    if ZYGOTE is not None and zygote_can_run(execname):
+        status = zygote_run(execname, fields)  # None if the zygote has gone away
+
+    if status is None:
+        pid = os.fork()  # create a child process
+        if pid == 0:  # child process
+            try:
+                os.execv(execname, fields)  # replace the child process with the external command
+            except Exception as e:
+                print(f"Error executing command: {e}")
+                os._exit(1)  # exit the child process with error code 1
         pid, status = os.waitpid(pid, 0)  # wait for the child process to complete
-        if os.WIFEXITED(status):
-            print(f"Command '{cmd}' executed successfully with return code {os.WEXITSTATUS(status)}.")
-        else:
-            print(f"Command '{cmd}' exited abnormally.")
+
+    if os.WIFEXITED(status):
+        print(f"Command '{cmd}' executed successfully with return code {os.WEXITSTATUS(status)}.")
+    else:
+        print(f"Command '{cmd}' exited abnormally.")
 
 # ========================
 #  Find executable in PATH
@@ -154,6 +595,547 @@ def find_executable(cmd):
     else:
         return cmd
 
+# ========================
+#  Python script launcher (zygote)
+# ========================
+def zygote_can_run(execname):
+    """returns True if execname is a python script meant for the interpreter running the shell.
+    
+    input: path of an executable file
+    action: reads the #! line and checks that its interpreter (directly or through
+            "env python3") is sys.executable, so scripts written for another python
+            or a virtualenv keep being exec'd with their own interpreter
+    output: returns a boolean value
+    """
+    
+    try:
+        with open(execname, 'rb') as f:
+            first_line = f.readline(256)
+    except OSError:
+        return False
+    if not first_line.startswith(b"#!"):
+        return False
+
+    words = os.fsdecode(first_line[2:]).split()
+    if not words:
+        return False
+    interpreter = words[0]
+    if os.path.basename(interpreter) == "env" and len(words) == 2:
+        interpreter = find_in_env_path(words[1])
+    elif len(words) > 1:
+        return False  # interpreter options (e.g. -u) are not supported by the zygote
+    return interpreter is not None and same_interpreter(interpreter)
+
+def find_in_env_path(name):
+    """returns the path env(1) would run for name (searching $PATH), or None."""
+    
+    for dir in os.environ.get("PATH", os.defpath).split(os.pathsep):
+        path = os.path.join(dir or ".", name)
+        if os.path.isfile(path) and os.access(path, os.X_OK):
+            return path
+    return None
+
+def same_interpreter(path):
+    """returns True if the python at path is the one running the shell (same packages too)."""
+    
+    if os.path.abspath(path) == os.path.abspath(sys.executable):
+        return True
+    # a virtualenv's python is a symlink to the base python but has its own packages
+    venv_cfg = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(path))), "pyvenv.cfg")
+    if os.path.exists(venv_cfg) or sys.prefix != sys.base_prefix:
+        return False
+    return os.path.realpath(path) == os.path.realpath(sys.executable)
+
+def start_zygote():
+    """forks the zygote when --zygote is given.
+    
+    input: no function arguments (looks at sys.argv)
+    action: forks a process that imports ZYGOTE_PRELOAD once and then serves run requests
+            sent over a pipe, so python scripts skip interpreter startup
+    output: returns no return value (sets ZYGOTE)
+    """
+    
+    global ZYGOTE
+    if "--zygote" not in sys.argv:
+        return
+    sys.argv.remove("--zygote")
+
+    request_r, request_w = os.pipe()
+    reply_r, reply_w = os.pipe()
+    pid = os.fork()
+    if pid == 0:  # zygote process
+        os.close(request_w)
+        os.close(reply_r)
+        zygote_loop(request_r, reply_w)
+        os._exit(0)
+    os.close(request_r)
+    os.close(reply_w)
+    ZYGOTE = (pid, request_w, reply_r)
+
+def zygote_loop(request_fd, reply_fd):
+    """serves run requests until the shell closes its end of the request pipe.
+    
+    input: the read end of the request pipe and the write end of the reply pipe
+    action: for each request (a length line, then that many bytes of NUL separated cwd,
+            script path and arguments) forks a child that runs the script with runpy
+            and waits for it
+    output: writes the child's wait status back as a line for each request
+    """
+    
+    import gc
+    import signal
+
+    for name in ZYGOTE_PRELOAD:
+        try:
+            __import__(name)
+        except ImportError:
+            pass
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # ctrl-c is for the script, not the zygote
+    # move everything imported so far out of the garbage collector's reach, so a script
+    # child doesn't copy those pages just because the collector walked over them
+    gc.collect()
+    gc.freeze()
+
+    with os.fdopen(request_fd, 'rb') as requests:
+        while True:
+            header = requests.readline()
+            if not header:  # the shell has exited
+                break
+            request = requests.read(int(header))
+            cwd, execname, *args = os.fsdecode(request).split("\0")
+            pid = os.fork()
+            if pid == 0:  # script process
+                # python's own handler, so ctrl-c raises KeyboardInterrupt like in a normal start
+                signal.signal(signal.SIGINT, signal.default_int_handler)
+                zygote_child(cwd, execname, args)
+            pid, status = os.waitpid(pid, 0)
+            os.write(reply_fd, b"%d\n" % status)
+
+def zygote_child(cwd, execname, args):
+    """runs a python script inside a process forked from the zygote, never returns.
+    
+    input: the shell's working directory, the script path and its arguments
+    action: sets up cwd, sys.argv and sys.path the way the interpreter would, runs
+            the script with runpy as __main__, then shuts down like the interpreter
+            (waits for non-daemon threads and runs atexit handlers)
+    output: exits the process with the script's exit code
+    """
+    
+    import atexit
+    import runpy
+    import threading
+    import traceback
+
+    code = 0
+    try:
+        os.chdir(cwd)
+        sys.argv = [execname] + args
+        sys.path[0] = os.path.dirname(os.path.abspath(execname))
+        runpy.run_path(execname, run_name="__main__")
+    except SystemExit as e:
+        if e.code is None:
+            code = 0
+        elif isinstance(e.code, int):
+            code = e.code
+        else:
+            print(e.code, file=sys.stderr)
+            code = 1
+    except BaseException:
+        traceback.print_exc()
+        code = 1
+
+    try:
+        threading._shutdown()  # join non-daemon threads
+    except BaseException:
+        traceback.print_exc()
+    atexit._run_exitfuncs()  # prints any exception raised by a handler itself
+    sys.stdout.flush()
+    sys.stderr.flush()
+    os._exit(code)
+
+def zygote_run(execname, fields):
+    """asks the zygote to run a python script and waits for it to finish.
+    
+    input: the script path and the list of fields typed by the user
+    action: sends a run request to the zygote and reads back the wait status
+    output: returns the wait status, or None to fall back to fork+exec (if the zygote
+            is gone it is also dropped)
+    """
+    
+    global ZYGOTE
+    pid, request_fd, reply_fd = ZYGOTE
+    try:
+        cwd = os.getcwd()
+    except OSError:  # the working directory was deleted, let the normal exec path deal with it
+        return None
+    # length first: a file name from a wildcard can contain a newline
+    request = os.fsencode("\0".join([cwd, execname] + fields[1:]))
+    sys.stdout.flush()  # keep the shell's output ahead of the script's
+    try:
+        os.write(request_fd, b"%d\n" % len(request) + request)
+        reply = b""
+        while not reply.endswith(b"\n"):
+            chunk = os.read(reply_fd, 64)
+            if not chunk:
+                raise BrokenPipeError("zygote exited")
+            reply += chunk
+        return int(reply)
+    except (OSError, ValueError):
+        import signal
+
+        os.close(request_fd)
+        os.close(reply_fd)
+        ZYGOTE = None
+        try:
+            os.kill(pid, signal.SIGKILL)  # in case it is still running but not answering
+            os.waitpid(pid, 0)  # reap it so no zombie is left behind
+        except (ProcessLookupError, ChildProcessError):
+            pass
+        return None
+
+# ========================
+#  Tab completion
+# ========================
+def setup_completion():
+    """turns on tab completion when the shell is interactive and readline is available.
+    
+    input: no function arguments
+    action: registers complete_word with readline for the PShell> prompt
+    output: returns no return value
+    """
+    
+    if not sys.stdin.isatty():
+        return
+    try:
+        import readline
+    except ImportError:
+        return
+
+    readline.set_completer_delims(" \t\n")  # so a path like a/b/c is one word
+    readline.set_completer(complete_word)
+    if "libedit" in (readline.__doc__ or ""):  # macOS
+        readline.parse_and_bind("bind ^I rl_complete")
+    else:
+        readline.parse_and_bind("tab: complete")
+
+def complete_word(text, state):
+    """returns the state-th completion of text (readline calls it until it gets None).
+    
+    input: the word being completed and the index of the match wanted
+    action: on the first call works out the matches: builtins and executables for the
+            first word of the line, file and directory paths for the others
+    output: returns the match, or None when there are no more
+    """
+    
+    if state == 0:
+        import readline
+
+        first_word = not readline.get_line_buffer()[:readline.get_begidx()].strip()
+        try:
+            if first_word and not text.startswith(("/", ".", "~")):
+                commands = prefix_matches(BUILTINS, text) + prefix_matches(executable_names(), text) + relative_executables(text)
+                COMPLETIONS[:] = [name + " " for name in sorted(set(commands))]
+            else:
+                COMPLETIONS[:] = complete_path(text)
+        except OSError:
+            COMPLETIONS[:] = []
+    return COMPLETIONS[state] if state < len(COMPLETIONS) else None
+
+def prefix_matches(names, prefix):
+    """returns the names in a sorted list that start with prefix (binary search, no scan)."""
+    
+    import bisect
+
+    start = bisect.bisect_left(names, prefix)
+    end = bisect.bisect_left(names, prefix + "\U0010ffff", start)
+    return names[start:end]
+
+def executable_names():
+    """returns the sorted executable names in THE_PATH.
+    
+    input: no function arguments
+    action: stats each absolute THE_PATH directory and re-reads only the ones whose
+            device, inode or mtime changed since they were last read
+    output: returns the sorted list of names
+    """
+    
+    global EXEC_NAMES
+    changed = False
+    for dir in THE_PATH:
+        if not os.path.isabs(dir):  # ./ follows the working directory, see relative_executables
+            continue
+        try:
+            stat_info = os.stat(dir)
+        except OSError:
+            changed = changed or EXEC_DIRS.pop(dir, None) is not None
+            continue
+        key = (stat_info.st_dev, stat_info.st_ino, stat_info.st_mtime_ns)
+        if dir in EXEC_DIRS and EXEC_DIRS[dir][0] == key:
+            continue
+        with os.scandir(dir) as entries:
+            names = [entry.name for entry in entries if entry.is_file() and os.access(entry.path, os.X_OK)]
+        EXEC_DIRS[dir] = (key, names)
+        changed = True
+
+    if changed:
+        EXEC_NAMES = sorted({name for key, names in EXEC_DIRS.values() for name in names})
+    return EXEC_NAMES
+
+def relative_executables(prefix):
+    """returns the executables starting with prefix in the relative THE_PATH dirs (./).
+    
+    input: the start of the command name
+    action: takes the matching names from the cached directory listing and checks only
+            those with os.access (nothing for an empty prefix, which would mean checking
+            every file in the directory)
+    output: returns a list of names
+    """
+    
+    if not prefix:
+        return []
+    names = []
+    for dir in THE_PATH:
+        if os.path.isabs(dir):
+            continue
+        try:
+            matches = prefix_matches(dir_listing(dir), prefix)
+        except OSError:
+            continue
+        names += [name for name in matches if not name.endswith("/") and os.access(os.path.join(dir, name), os.X_OK)]
+    return names
+
+def complete_path(text):
+    """returns the file and directory paths that complete text."""
+    
+    dir_part, base = os.path.split(text)
+    head = text[:len(text) - len(base)]  # what the user typed before the name being completed
+    head = os.path.expanduser(head)  # the command line doesn't expand ~, so the match has to
+    matches = prefix_matches(dir_listing(os.path.expanduser(dir_part) or "."), base)
+    # a space after files so the next word can be typed, none after dirs so the path can go on
+    return [head + name if name.endswith("/") else head + name + " " for name in matches]
+
+def dir_listing(dir_name):
+    """returns the sorted names in a directory (with "/" after subdirectories).
+    
+    input: the directory name
+    action: re-reads the directory only if its device, inode or mtime changed since the
+            cached listing was made, keeping at most LISTINGS_SIZE listings
+    output: returns the sorted list of names
+    """
+    
+    stat_info = os.stat(dir_name)
+    key = (stat_info.st_dev, stat_info.st_ino, stat_info.st_mtime_ns)
+    path = os.path.abspath(dir_name)
+    if path in LISTINGS and LISTINGS[path][0] == key:
+        LISTINGS[path] = LISTINGS.pop(path)  # move to the end (most recently used)
+        return LISTINGS[path][1]
+
+    with os.scandir(dir_name) as entries:
+        names = sorted(entry.name + "/" if entry.is_dir() else entry.name for entry in entries)
+    LISTINGS.pop(path, None)
+    LISTINGS[path] = (key, names)
+    if len(LISTINGS) > LISTINGS_SIZE:
+        del LISTINGS[next(iter(LISTINGS))]  # drop the least recently used listing
+    return names
+
+# ========================
+#  Command line parsing
+# ========================
+GLOB_CHARS = "*?["
+
+def split_line(line):
+    """returns the fields of a command line with wildcards expanded.
+    
+    input: the line typed by the user
+    action: splits the line into words (quotes and backslashes keep spaces and wildcards
+            literal) and replaces each word with unquoted *, ?, [...] or ** by the sorted
+            paths it matches, each once (a word that matches nothing is kept as it is)
+    output: returns the list of fields (raises ValueError for an unclosed quote)
+    """
+    
+    fields = []
+    for text, pattern in split_words(line):
+        matches = sorted(set(glob_paths(pattern))) if pattern is not None else []
+        fields.extend(matches or [text])
+    return fields
+
+def split_words(line):
+    """returns the words of a line as (text, pattern) pairs.
+    
+    input: the line typed by the user
+    action: splits on unquoted whitespace and removes quotes and backslashes
+    output: returns a list of (text, pattern) where pattern is None unless the word has
+            unquoted wildcards, and has quoted wildcards escaped as [*] so they only match themselves
+    """
+    
+    words = []
+    text = pattern = None  # None until a word has started
+    wild = False
+    quote = None
+    i = 0
+    while i < len(line):
+        char = line[i]
+        if quote is None and char.isspace():
+            if text is not None:
+                words.append((text, pattern if wild else None))
+                text = pattern = None
+                wild = False
+            i += 1
+            continue
+
+        if text is None:
+            text = pattern = ""
+        if quote is not None:
+            if char == quote:
+                quote = None
+            elif quote == '"' and char == "\\" and line[i + 1:i + 2] in ['"', "\\"]:  # \" and \\ inside "..."
+                i += 1
+                text += line[i]
+                pattern += line[i]
+            else:
+                text += char
+                pattern += f"[{char}]" if char in GLOB_CHARS else char
+        elif char in "'\"":
+            quote = char
+        elif char == "\\" and i + 1 < len(line):  # backslash escapes the next character
+            i += 1
+            text += line[i]
+            pattern += f"[{line[i]}]" if line[i] in GLOB_CHARS else line[i]
+        else:
+            text += char
+            pattern += char
+            wild = wild or char in GLOB_CHARS
+        i += 1
+
+    if quote is not None:
+        raise ValueError(f"missing closing {quote}")
+    if text is not None:
+        words.append((text, pattern if wild else None))
+    return words
+
+def glob_paths(pattern):
+    """yields the paths matching a glob pattern as they are found.
+    
+    input: the pattern (*, ?, [...] within a name, ** for any number of directories)
+    action: compiles each part of the pattern once, then walks the tree with os.scandir,
+            reading each directory at most once and only going into directories that
+            can still match (plain names are looked up without reading the directory)
+    output: yields the matching paths, unsorted (dirs end in / if the pattern does)
+    """
+    
+    import fnmatch
+    import re
+
+    # ("name", text), ("match", (regex match, can match .names)) or ("**", None)
+    segments = []
+    for part in pattern.split("/"):
+        if not part or part == "**" and segments and segments[-1][0] == "**":
+            continue  # leading, doubled or trailing / and repeated **
+        if part == "**":
+            segments.append(("**", None))
+        elif any(char in part for char in GLOB_CHARS):
+            segments.append(("match", (re.compile(fnmatch.translate(part)).match, part.startswith("."))))
+        else:
+            segments.append(("name", part))
+
+    prefix = "/" if pattern.startswith("/") else ""
+    dirs_only = pattern.endswith("/")
+    yield from match_segments(prefix, segments, dirs_only)
+
+def match_segments(prefix, segments, dirs_only):
+    """yields the paths under prefix that match the compiled segments."""
+    
+    kind, value = segments[0]
+    rest = segments[1:]
+
+    if kind == "**":
+        if not rest and prefix:  # like bash, x/** and x/**/ include x/ itself
+            yield os.path.join(prefix, "")
+        yield from match_star(prefix, rest, dirs_only)
+        return
+
+    if kind == "name":  # plain names are looked up directly, no need to read the directory
+        path = os.path.join(prefix, value)
+        if rest:
+            if os.path.isdir(path):
+                yield from match_segments(path, rest, dirs_only)
+        elif os.path.lexists(path) and (not dirs_only or os.path.isdir(path)):
+            yield path + "/" if dirs_only else path
+        return
+
+    try:
+        entries = list(os.scandir(prefix or "."))
+    except OSError:
+        return
+    for entry in entries:
+        if match_name(value, entry.name):
+            yield from match_entry(entry, os.path.join(prefix, entry.name), rest, dirs_only)
+
+def match_star(prefix, rest, dirs_only):
+    """yields the paths under prefix matching ** (zero or more directories) followed by rest.
+    
+    input: the directory reached so far, the segments after ** and the dirs-only flag
+    action: reads the directory once, trying each entry both as the end of ** (against
+            the next segment) and as one more directory inside ** (hidden and symlinked
+            directories are not entered, like bash)
+    output: yields the matching paths
+    """
+    
+    if rest and rest[0][0] == "name":  # zero directories: check the plain name directly
+        yield from match_segments(prefix, rest, dirs_only)
+
+    try:
+        entries = list(os.scandir(prefix or "."))
+    except OSError:
+        return
+    for entry in entries:
+        path = os.path.join(prefix, entry.name)
+        if not rest:  # ** at the end matches everything below
+            if not entry.name.startswith("."):
+                yield from match_entry(entry, path, rest, dirs_only)
+        elif rest[0][0] == "match" and match_name(rest[0][1], entry.name):  # zero directories
+            yield from match_entry(entry, path, rest[1:], dirs_only)
+        if entry.is_dir(follow_symlinks=False) and not entry.name.startswith("."):
+            yield from match_star(path, rest, dirs_only)
+
+def match_entry(entry, path, rest, dirs_only):
+    """yields path if it is a complete match, or carries on matching rest inside it."""
+    
+    if rest:
+        if entry.is_dir():
+            yield from match_segments(path, rest, dirs_only)
+    elif not dirs_only:
+        yield path
+    elif entry.is_dir():
+        yield path + "/"
+
+def match_name(value, name):
+    """returns if name matches a compiled pattern (names starting with . need a pattern starting with .)."""
+    
+    match, dot_ok = value
+    if name.startswith(".") and not dot_ok:
+        return False
+    return match(name) is not None
+
+# ========================
+#  Startup report
+# ========================
+def startup_report():
+    """re-runs the shell under -X importtime when --startup-report is given.
+    
+    input: no function arguments (looks at sys.argv)
+    action: removes the flag and, unless already running with -X importtime, replaces
+            the process with the same script run under -X importtime so every import
+            (including the lazy ones done by the commands) is timed on stderr
+    output: returns no return value
+    """
+    
+    if "--startup-report" not in sys.argv:
+        return
+    sys.argv.remove("--startup-report")
+    if "importtime" not in sys._xoptions:  # not re-run yet
+        os.execv(sys.executable, [sys.executable, "-X", "importtime"] + sys.argv)
+
 # ---------------------------------------------------------------------
 
 def main():
@@ -164,15 +1146,33 @@ def main():
     output: return zero to indicate regular termination
     """
     
+    startup_report()
+    start_zygote()
+    setup_completion()
+    setup_history()
     while True:
         line = input("PShell>")
-        fields = line.split()  # split the command into fields stored in the fields list
+        if line.strip():
+            add_history(line)
+        try:
+            fields = split_line(line)  # split the command into fields stored in the fields list (wildcards expanded)
+        except ValueError as e:
+            print(f"Error: {e}")
+            continue
+        if not fields:
+            continue
         # fields[0] is the command name and anything that follows (if it follows) is an argument to the command
         
         if fields[0] == "files":
             files_cmd(fields)
         elif fields[0] == "info":
             info_cmd(fields)
+        elif fields[0] == "watch":
+            watch_cmd(fields)
+        elif fields[0] == "cache":
+            cache_cmd(fields)
+        elif fields[0] == "history":
+            history_cmd(fields)
         elif fields[0] == "exit":
             print("Exiting shell...")
             sys.exit(0)
@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+
+"""test_parsing.py:
+table driven checks for the command line parsing in partA.py and partB.py
+(quoting, escaping and wildcard expansion) and for partA's brace expansion in make.
+
+run with: python -m unittest test_parsing  (or pytest)
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+import partA  # noqa: E402
+import partB  # noqa: E402
+
+# (command line, fields) pairs that don't depend on any files
+QUOTING_CASES = [
+    ("ls", ["ls"]),
+    ("  ls   -l  ", ["ls", "-l"]),
+    ("", []),
+    ("echo 'a b'", ["echo", "a b"]),
+    ('echo "a b" c', ["echo", "a b", "c"]),
+    ("echo a' 'b", ["echo", "a b"]),
+    ("echo ''", ["echo", ""]),
+    ('echo "a\\"b"', ["echo", 'a"b']),
+    ('echo "c\\\\d"', ["echo", "c\\d"]),
+    ('echo "e\\nf"', ["echo", "e\\nf"]),
+    ("echo 'g\\h'", ["echo", "g\\h"]),
+    ("echo a\\ b", ["echo", "a b"]),
+    ('echo "it\'s"', ["echo", "it's"]),
+]
+
+# command lines with an unclosed quote
+UNCLOSED_CASES = ["echo 'a", 'echo "a', 'echo "a\\"']
+
+# files and directories made for the wildcard cases
+TREE = [
+    "x.log", "y.log", "notes.txt", "star*.log", ".hidden.log",
+    "a/one.log", "a/b/two.log", "a/b/c/three.log", "a/b/y/b/c/four.log",
+    ".dot/secret.log", "d/q.txt",
+]
+
+# (command line, fields) pairs run inside a directory holding TREE
+GLOB_CASES = [
+    ("ls *.log", ["ls", "star*.log", "x.log", "y.log"]),
+    ("ls ?.log", ["ls", "x.log", "y.log"]),
+    ("ls [xz].log", ["ls", "x.log"]),
+    ("ls nomatch*", ["ls", "nomatch*"]),
+    # quoted or escaped wildcards match only themselves
+    ('ls "*.log"', ["ls", "*.log"]),
+    ("ls '*'.log", ["ls", "*.log"]),
+    ("ls \\*.log", ["ls", "*.log"]),
+    ('ls "star*"*', ["ls", "star*.log"]),
+    # hidden names need a pattern starting with .
+    ("ls .*.log", ["ls", ".hidden.log"]),
+    ("ls .d*", ["ls", ".dot"]),
+    # a trailing / matches directories only
+    ("ls */", ["ls", "a/", "d/"]),
+    ("ls a/*/", ["ls", "a/b/"]),
+    # ** is zero or more directories (hidden ones are not entered)
+    ("ls **/*.log", ["ls", "a/b/c/three.log", "a/b/two.log", "a/b/y/b/c/four.log", "a/one.log",
+                     "star*.log", "x.log", "y.log"]),
+    ("ls a/**/two.log", ["ls", "a/b/two.log"]),
+    ("ls **/c", ["ls", "a/b/c", "a/b/y/b/c"]),
+    ("ls a/b/**", ["ls", "a/b/", "a/b/c", "a/b/c/three.log", "a/b/two.log", "a/b/y", "a/b/y/b",
+                   "a/b/y/b/c", "a/b/y/b/c/four.log"]),
+    ("ls a/b/**/", ["ls", "a/b/", "a/b/c/", "a/b/y/", "a/b/y/b/", "a/b/y/b/c/"]),
+    # two ** can reach a path twice, it is only listed once
+    ("ls **/b/**/c", ["ls", "a/b/c", "a/b/y/b/c"]),
+    ("ls ./a/*.log", ["ls", "./a/one.log"]),
+]
+
+# (word, names) pairs for partA.expandBraces
+BRACE_CASES = [
+    ("plain", ["plain"]),
+    ("f{1..3}", ["f1", "f2", "f3"]),
+    ("f{01..3}", ["f01", "f02", "f03"]),
+    ("{01..10}", ["01", "02", "03", "04", "05", "06", "07", "08", "09", "10"]),
+    ("{3..1}", ["3", "2", "1"]),
+    ("{-1..1}", ["-1", "0", "1"]),
+    ("{a,b}.txt", ["a.txt", "b.txt"]),
+    ("{a,b}{1..2}", ["a1", "a2", "b1", "b2"]),
+    ("x{a,{b,c}}", ["xa", "xb", "xc"]),
+    ("{a,{b,c}}{1,2}", ["a1", "a2", "b1", "b2", "c1", "c2"]),
+    # anything that isn't a list or a range stays as it is
+    ("{a{b,c}", ["{ab", "{ac"]),
+    ("a{x}b{1..3}", ["a{x}b1", "a{x}b2", "a{x}b3"]),
+    ("{a..c}", ["{a..c}"]),
+    ("{}", ["{}"]),
+    ("a,b", ["a,b"]),
+]
+
+# words that expand to more than MAKE_LIMIT names
+OVER_LIMIT_CASES = ["{1..10000000000}", "{1..1000}{1..1001}", "{a,b}{1..500001}"]
+
+
+class QuotingTest(unittest.TestCase):
+
+    def test_quoting(self):
+        for split_line in [partA.splitLine, partB.split_line]:
+            for line, fields in QUOTING_CASES:
+                with self.subTest(script=split_line.__module__, line=line):
+                    self.assertEqual(split_line(line), fields)
+
+    def test_unclosed_quote(self):
+        for split_line in [partA.splitLine, partB.split_line]:
+            for line in UNCLOSED_CASES:
+                with self.subTest(script=split_line.__module__, line=line):
+                    with self.assertRaises(ValueError):
+                        split_line(line)
+
+
+class GlobTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        for path in TREE:
+            path = os.path.join(self.root, path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            open(path, "w").close()
+        os.chdir(self.root)
+
+    def tearDown(self):
+        os.chdir(HERE)
+        shutil.rmtree(self.root)
+
+    def test_glob(self):
+        for split_line in [partA.splitLine, partB.split_line]:
+            for line, fields in GLOB_CASES:
+                with self.subTest(script=split_line.__module__, line=line):
+                    self.assertEqual(split_line(line), fields)
+
+    def test_absolute_pattern(self):
+        for split_line in [partA.splitLine, partB.split_line]:
+            with self.subTest(script=split_line.__module__):
+                self.assertEqual(split_line(f"ls {self.root}/a/*.log"), ["ls", f"{self.root}/a/one.log"])
+
+
+class BraceTest(unittest.TestCase):
+
+    def test_expand_braces(self):
+        for word, names in BRACE_CASES:
+            with self.subTest(word=word):
+                self.assertEqual(partA.expandBraces(word), names)
+
+    def test_make_limit(self):
+        self.assertEqual(len(partA.expandBraces("{1..1000}{1..1000}")), partA.MAKE_LIMIT)
+        for word in OVER_LIMIT_CASES:
+            with self.subTest(word=word):
+                with self.assertRaises(ValueError):
+                    partA.expandBraces(word)
+
+
+if __name__ == '__main__':
+    unittest.main()
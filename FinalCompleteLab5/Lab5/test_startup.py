@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+
+"""test_startup.py:
+checks that partA.py and partB.py stay quick to start.
+
+for both scripts, run interactively (on a pseudo terminal) and with piped input:
+- the first PShell> prompt has to appear within STARTUP_BUDGET seconds of starting the process
+- none of the modules in LAZY_MODULES may be imported before that prompt
+  (they are only meant to be imported by the commands that use them)
+
+run with: python -m unittest test_startup  (or pytest)
+"""
+
+import os
+import pty
+import select
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS = ["partA.py", "partB.py"]
+STARTUP_BUDGET = float(os.environ.get("PSHELL_STARTUP_BUDGET", "0.3"))  # seconds to the first prompt
+RUNS = 3  # the best of this many runs is compared against the budget
+PROMPT = b"PShell>"
+
+# modules that must not be imported before the first prompt (unless the interpreter itself does)
+LAZY_MODULES = {
+    "bisect", "ctypes", "datetime", "fnmatch", "glob", "mmap", "pwd", "re",
+    "runpy", "shutil", "struct", "subprocess", "threading", "time", "traceback",
+}
+
+
+def run_until_prompt(args, env, tty):
+    """returns (seconds until the first prompt, output before it) for python run with args.
+
+    input: the interpreter arguments, the environment and whether to run on a pseudo terminal
+    action: starts the process, reads its output until the prompt shows up, then kills it
+    output: returns a tuple of the elapsed time and the output (stdout and stderr) before the prompt
+    """
+
+    start = time.perf_counter()
+    if tty:
+        pid, fd = pty.fork()
+        if pid == 0:  # child process
+            os.execve(sys.executable, [sys.executable] + args, env)
+    else:
+        process = subprocess.Popen([sys.executable] + args, env=env, cwd=env["HOME"],
+                                   stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        pid, fd = process.pid, process.stdout.fileno()
+
+    output = b""
+    try:
+        while PROMPT not in output:
+            if not select.select([fd], [], [], 10)[0]:
+                raise AssertionError(f"no prompt after 10s, output: {output!r}")
+            try:
+                chunk = os.read(fd, 4096)
+            except OSError:  # pty closed
+                chunk = b""
+            if not chunk:
+                raise AssertionError(f"exited before the prompt, output: {output!r}")
+            output += chunk
+        elapsed = time.perf_counter() - start
+    finally:
+        os.kill(pid, signal.SIGKILL)
+        os.waitpid(pid, 0)
+        if tty:
+            os.close(fd)
+        else:
+            process.stdin.close()
+            process.stdout.close()
+    return elapsed, output[:output.index(PROMPT)].decode(errors="replace")
+
+
+def imported_modules(importtime_output):
+    """returns the set of module names listed in -X importtime output."""
+
+    names = set()
+    for line in importtime_output.splitlines():
+        if line.startswith("import time:") and "|" in line and "imported package" not in line:
+            names.add(line.rsplit("|", 1)[1].strip())
+    return names
+
+
+class StartupTest(unittest.TestCase):
+
+    def setUp(self):
+        # a home of its own, with some history and visited directories for the shells to load
+        self.home = tempfile.mkdtemp()
+        self.env = dict(os.environ, HOME=self.home,
+                        PSHELL_HISTORY=os.path.join(self.home, ".pshell_history"),
+                        PSHELL_DIRS=os.path.join(self.home, ".pshell_dirs"))
+        with open(self.env["PSHELL_HISTORY"], "wb") as f:
+            f.write(b"".join(b"\x1einfo file%d\n" % i for i in range(5000)))
+        os.chdir(self.home)
+
+    def tearDown(self):
+        os.chdir(HERE)
+        shutil.rmtree(self.home)
+
+    def test_time_to_first_prompt(self):
+        for script in SCRIPTS:
+            for tty in [True, False]:
+                with self.subTest(script=script, tty=tty):
+                    best = min(run_until_prompt([os.path.join(HERE, script)], self.env, tty)[0]
+                               for _ in range(RUNS))
+                    self.assertLess(best, STARTUP_BUDGET, f"{script} took {best:.3f}s to its first prompt")
+
+    def test_no_lazy_imports_before_first_prompt(self):
+        _, baseline = run_until_prompt(["-X", "importtime", "-c", "print('PShell>')"], self.env, False)
+        preloaded = imported_modules(baseline)  # imported by the interpreter itself (site etc.)
+        for script in SCRIPTS:
+            for tty in [True, False]:
+                with self.subTest(script=script, tty=tty):
+                    _, output = run_until_prompt(["-X", "importtime", os.path.join(HERE, script)], self.env, tty)
+                    early = (imported_modules(output) - preloaded) & LAZY_MODULES
+                    self.assertFalse(early, f"{script} imported {sorted(early)} before its first prompt")
+
+
+if __name__ == '__main__':
+    unittest.main()